@@ -1,13 +1,24 @@
 import os
+import re
+import json
+import asyncio
+import time
+import hashlib
 import logging
-from typing import Optional
-from openai import OpenAI
+import operator
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
 from a2a.server.events.event_queue import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import TaskState
 from a2a.utils import new_agent_text_message
-from pydantic import BaseModel, ConfigDict
-from observability import create_trace, create_generation, flush_observability
+from observability import create_trace, emit, record_metrics, should_trace
 
 # Load environment variables
 try:
@@ -16,204 +27,588 @@ try:
 except ImportError:
     pass
 
+# Optional dependencies for the semantic cache
+try:
+    import faiss
+    import numpy as np
+except ImportError:
+    faiss = None
+
+# Optional dependency for the shared (cross-worker) response cache
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 
-class QuoteGenerator(BaseModel):
-    """Quote generator that creates inspirational quotes using OpenAI GPT models."""
-    
-    # Private attributes are allowed in Pydantic models
-    _client: Optional[OpenAI] = None
+class _ResponseCache:
+    """In-process LRU cache with TTL expiry for generated quotes."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self._ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        """Store value under key, dropping expired entries and evicting the least recently used if full."""
+        now = time.monotonic()
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        # Best-effort prune from the least recently used end: get() moves hits to the
+        # end without refreshing stored_at, so expired entries can sit further in and
+        # are only dropped when get() reaches them
+        while self._entries:
+            oldest_key, (stored_at, _) = next(iter(self._entries.items()))
+            if now - stored_at <= self._ttl:
+                break
+            del self._entries[oldest_key]
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+
+# Models are read once; the environment does not change after startup
+_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+
+# A 1-2 sentence quote with attribution fits well within this completion budget
+_MAX_TOKENS = 80
+
+# Prompt scaffolding shared by every request. The static instructions come first and
+# only the final line varies, so providers can reuse their cached prompt prefix.
+_SYSTEM_MSG = {"role": "system", "content": "You are a wise quote generator that creates original, inspirational quotes."}
+
+_QUOTE_INSTRUCTIONS = """Generate a single, original inspirational quote.
+The quote should be:
+- Meaningful and thought-provoking
+- Concise (1-2 sentences maximum)
+- Suitable for motivation or reflection
+- Original (not a famous existing quote)
+
+Format: Just return the quote with proper attribution like "Quote" - Anonymous
+
+"""
+
+_GENERATE_QUOTE_TEMPLATE = _QUOTE_INSTRUCTIONS + "Topic: {topic}"
+
+_RANDOM_QUOTE_MESSAGES = [
+    _SYSTEM_MSG,
+    {
+        "role": "user",
+        "content": _QUOTE_INSTRUCTIONS
+        + "Topic: any inspiring topic you choose (success, courage, love, growth, wisdom, etc.)",
+    },
+]
+
+# Keywords that route a request to random quote generation (matched against lowercased text)
+_RANDOM_RE = re.compile(r"\b(random|surprise|any\s+topic|choose)\b")
+
+# Topic extraction: text after "about", otherwise the message minus request filler words
+_TOPIC_ABOUT_RE = re.compile(r"\babout\s+([^?.!]+)")
+_TOPIC_STRIP_RE = re.compile(r"\b(?:quote|generate|create|give\s+me)\b")
+
+# Cache for topic quotes; random quotes are never cached
+_RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+_response_cache = _ResponseCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+    ttl=_RESPONSE_CACHE_TTL_SECONDS,
+)
+
+
+class _SemanticCache:
+    """Nearest-neighbour cache that matches paraphrased topics by embedding similarity.
+
+    search/add run in worker threads so the index is guarded by a lock.
+    """
+
+    def __init__(self, threshold: float = 0.92, capacity: int = 10000):
+        self._threshold = threshold
+        self._capacity = capacity
+        self._index = None
+        self._quotes: dict[int, str] = {}
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(embedding: list[float]) -> "np.ndarray":
+        """Convert an embedding into an L2-normalised row vector for inner-product search."""
+        vector = np.asarray(embedding, dtype="float32").reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def search(self, vector: "np.ndarray") -> Optional[str]:
+        """Return the quote of the closest stored topic if it is similar enough."""
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return None
+            scores, ids = self._index.search(vector, 1)
+            if ids[0][0] == -1 or scores[0][0] < self._threshold:
+                return None
+            return self._quotes[int(ids[0][0])]
+
+    def add(self, vector: "np.ndarray", quote: str) -> None:
+        """Store a quote, overwriting the oldest entry once capacity is reached."""
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+            slot = self._next_slot % self._capacity
+            slot_ids = np.array([slot], dtype="int64")
+            if slot in self._quotes:
+                self._index.remove_ids(slot_ids)
+            self._index.add_with_ids(vector, slot_ids)
+            self._quotes[slot] = quote
+            self._next_slot += 1
+
+
+def _setup_semantic_cache() -> Optional[_SemanticCache]:
+    """Create the semantic cache if it is enabled and its dependencies are installed."""
+    if os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() != "true":
+        return None
+    if faiss is None:
+        logger.warning("⚠️ SEMANTIC_CACHE_ENABLED is set but faiss/numpy are not installed")
+        return None
+    threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    logger.info("🧠 Semantic cache enabled (threshold=%s)", threshold)
+    return _SemanticCache(threshold=threshold)
+
+
+_semantic_cache = _setup_semantic_cache()
+
+
+# OpenAI clients shared across QuoteGenerator instances, keyed by a hash of their credentials
+_shared_clients: dict[str, AsyncOpenAI] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def _get_shared_openai_client() -> Optional[AsyncOpenAI]:
+    """Return the process-wide OpenAI client, creating it on first use."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        logger.error("❌ OPENAI_API_KEY not found in environment variables")
+        return None
     
-    def __init__(self, **data):
-        super().__init__(**data)
-        # Initialize the OpenAI client as a private attribute
-        self._client = self._initialize_openai_client()
+    base_url = os.getenv("OPENAI_BASE_URL")
+    client_key = hashlib.sha256(f"{api_key}|{base_url}".encode()).hexdigest()
+    client = _shared_clients.get(client_key)
+    if client is not None:
+        return client
     
-    def _initialize_openai_client(self) -> Optional[OpenAI]:
-        """Initialize OpenAI client with API key from environment."""
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            logger.error("❌ OPENAI_API_KEY not found in environment variables")
-            return None
+    with _shared_clients_lock:
+        client = _shared_clients.get(client_key)
+        if client is None:
+            try:
+                # Keep idle sockets alive between requests and multiplex over HTTP/2;
+                # the SDK's client subclass keeps its other transport defaults
+                http_client = DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "64")),
+                        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "128")),
+                        keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "300")),
+                    ),
+                    timeout=httpx.Timeout(30.0, connect=5.0),
+                    http2=True,
+                )
+                client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+                _shared_clients[client_key] = client
+                logger.info("✅ OpenAI client initialized successfully")
+            except Exception as e:
+                logger.error("❌ Failed to initialize OpenAI client: %s", e)
+                return None
+    return client
+
+
+async def warm_up_shared_openai_clients() -> None:
+    """Open a pooled connection for each shared OpenAI client so the first request skips the TLS handshake."""
+    for client in list(_shared_clients.values()):
+        try:
+            # Copies share the parent's connection pool
+            await client.with_options(timeout=5.0, max_retries=0).models.list()
+            logger.info("🔥 OpenAI connection warmed up")
+        except Exception as e:
+            logger.warning("⚠️ OpenAI connection warm-up failed: %s", e)
+
+
+async def close_shared_openai_clients() -> None:
+    """Close the connection pools of all shared OpenAI clients."""
+    for client in list(_shared_clients.values()):
+        await client.close()
+    _shared_clients.clear()
+
+
+# Callback that receives each streamed chunk of a completion
+DeltaCallback = Callable[[str], Awaitable[None]]
+
+
+class _PromptBatcher:
+    """Coalesces concurrent identical chat completion requests into one streamed call with n > 1."""
+
+    def __init__(self, window: float = 0.02, max_batch_size: int = 8, max_inflight: int = 32):
+        self._window = window
+        self._max_batch_size = max_batch_size
+        # Caps concurrent OpenAI calls so bursts queue here instead of hitting 429s
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self._pending: dict[str, tuple[list[tuple[asyncio.Future, Optional[DeltaCallback]]], asyncio.Event]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(
+        self, client: AsyncOpenAI, key: str, request: dict, on_delta: Optional[DeltaCallback] = None
+    ) -> tuple[str, Any, int]:
+        """Queue a request and return its completion text, the batch token usage and the batch size.
+
+        The batch usage is returned to only one request of the batch (None for the others),
+        so summing usage across requests counts each OpenAI call once.
+        If on_delta is given it is awaited with each chunk of this request's completion as it streams in.
+        """
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = ([], asyncio.Event())
+            task = asyncio.create_task(self._flush(client, key, batch, request))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        
+        waiters, full = batch
+        waiters.append((future, on_delta))
+        if len(waiters) >= self._max_batch_size:
+            # Start a fresh batch for later arrivals and send this one now
+            del self._pending[key]
+            full.set()
+        return await future
+
+    async def _flush(self, client: AsyncOpenAI, key: str, batch: tuple, request: dict) -> None:
+        """Wait for the batch window to close, then stream a single n=k completion to every waiter."""
+        waiters, full = batch
+        try:
+            await asyncio.wait_for(full.wait(), timeout=self._window)
+        except asyncio.TimeoutError:
+            pass
+        if self._pending.get(key) is batch:
+            del self._pending[key]
         
+        listeners = [on_delta for _, on_delta in waiters]
+        contents: list[list[str]] = [[] for _ in waiters]
+        usage = None
         try:
-            client = OpenAI(api_key=api_key)
-            logger.info("✅ OpenAI client initialized successfully")
-            return client
+            async with self._inflight:
+                stream = await client.chat.completions.create(
+                    **request,
+                    n=len(waiters),
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    for choice in chunk.choices:
+                        delta = choice.delta.content
+                        if not delta or choice.index >= len(waiters):
+                            continue
+                        contents[choice.index].append(delta)
+                        listener = listeners[choice.index]
+                        if listener is not None:
+                            try:
+                                await listener(delta)
+                            except Exception as e:
+                                # A failing consumer must not break the rest of the batch
+                                logger.warning("⚠️ Dropping stream listener after error: %s", e)
+                                listeners[choice.index] = None
         except Exception as e:
-            logger.error(f"❌ Failed to initialize OpenAI client: {e}")
-            return None
+            for future, _ in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (future, _), parts in zip(waiters, contents):
+            if future.done():
+                continue
+            if parts:
+                future.set_result(("".join(parts), usage, len(waiters)))
+                usage = None
+            else:
+                future.set_exception(RuntimeError("OpenAI returned no content for this request"))
+
+
+_prompt_batcher = _PromptBatcher(
+    window=float(os.getenv("QUOTE_BATCH_WINDOW_MS", "20")) / 1000,
+    max_batch_size=int(os.getenv("QUOTE_BATCH_MAX_SIZE", "8")),
+    max_inflight=int(os.getenv("MAX_INFLIGHT", "32")),
+)
+
+
+def _setup_redis_cache():
+    """Connect the shared L2 response cache if REDIS_URL is set and redis is installed."""
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return None
+    if aioredis is None:
+        logger.warning("⚠️ REDIS_URL is set but the redis package is not installed")
+        return None
+    logger.info("🗄️ Redis response cache enabled")
+    # Short timeouts so an unreachable Redis never holds up quote generation
+    return aioredis.from_url(redis_url, decode_responses=True, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+
+_redis_cache = _setup_redis_cache()
+
+
+async def _redis_get(key: str) -> Optional[str]:
+    """Read a quote from the shared cache, treating any Redis failure as a miss."""
+    try:
+        return await _redis_cache.get(f"quote_agent:{key}")
+    except Exception as e:
+        logger.warning("⚠️ Redis cache read failed: %s", e)
+        return None
+
+
+async def _redis_set(key: str, quote: str) -> None:
+    """Write a quote to the shared cache, ignoring Redis failures."""
+    try:
+        await _redis_cache.setex(f"quote_agent:{key}", _RESPONSE_CACHE_TTL_SECONDS, quote)
+    except Exception as e:
+        logger.warning("⚠️ Redis cache write failed: %s", e)
+
+
+async def close_redis_cache() -> None:
+    """Close the shared Redis connection pool, if one was opened."""
+    if _redis_cache is not None:
+        await _redis_cache.aclose()
+
+
+def _cache_key(model: str, messages: list, temperature: float, max_tokens: int) -> str:
+    """Build a stable cache key for a chat completion request."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# The random-quote request never varies, so build it and its batch key once
+_RANDOM_QUOTE_REQUEST = {"model": _MODEL, "messages": _RANDOM_QUOTE_MESSAGES, "max_tokens": _MAX_TOKENS, "temperature": 0.9}
+_RANDOM_QUOTE_KEY = _cache_key(_MODEL, _RANDOM_QUOTE_MESSAGES, 0.9, _MAX_TOKENS)
+
+
+_UNAVAILABLE_MESSAGE = "Sorry, the quote generation service is currently unavailable. Please check the OpenAI API key configuration."
+
+
+class QuoteGenerator:
+    """Quote generator that creates inspirational quotes using OpenAI GPT models."""
     
-    async def generate_quote(self, topic: str = "general inspiration") -> str:
-        """Generate a quote on the specified topic."""
-        if not self._client:
-            return "Sorry, the quote generation service is currently unavailable. Please check the OpenAI API key configuration."
+    __slots__ = ("_client",)
+    
+    def __init__(self):
+        # Share one OpenAI client (and its connection pool) across instances
+        self._client = _get_shared_openai_client()
+        # Without a client every call has the same answer, so switch to the stub methods once
+        if self._client is None:
+            self.__class__ = _UnavailableQuoteGenerator
+    
+    async def generate_quote(self, topic: str = "general inspiration", on_delta: Optional[DeltaCallback] = None, traced: bool = False) -> str:
+        """Generate a quote on the specified topic, streaming chunks to on_delta if given.
+
+        traced is the caller's sampling decision; the generation is only traced when it is set.
+        """
+        topic = topic.lower().strip()
+        messages = [_SYSTEM_MSG, {"role": "user", "content": _GENERATE_QUOTE_TEMPLATE.format(topic=topic)}]
+        
+        # Serve repeat topics from the response cache
+        cache_key = _cache_key(_MODEL, messages, 0.8, _MAX_TOKENS)
+        cached_quote = _response_cache.get(cache_key)
+        if cached_quote is not None:
+            logger.debug("🟢 Cache hit for topic '%s' (hits=%s, misses=%s)", topic, _response_cache.hits, _response_cache.misses)
+            return cached_quote
+        logger.debug("⚪ Cache miss for topic '%s' (hits=%s, misses=%s)", topic, _response_cache.hits, _response_cache.misses)
+        
+        # Then the shared cache, which other workers may have populated
+        if _redis_cache is not None:
+            shared_quote = await _redis_get(cache_key)
+            if shared_quote is not None:
+                logger.debug("🟢 Redis cache hit for topic '%s'", topic)
+                _response_cache.set(cache_key, shared_quote)
+                return shared_quote
+        
+        # Fall back to the semantic cache for paraphrased topics; the index
+        # scan is CPU-bound, so keep it off the event loop
+        topic_vector = await self._embed_topic(topic) if _semantic_cache else None
+        if topic_vector is not None:
+            similar_quote = await asyncio.to_thread(_semantic_cache.search, topic_vector)
+            if similar_quote is not None:
+                logger.debug("🟢 Semantic cache hit for topic '%s'", topic)
+                return similar_quote
         
         # Create observability trace
         trace = create_trace(
             name="quote_generation",
             input={"topic": topic, "type": "topic_specific"},
             metadata={"agent": "quote_generator", "version": "1.0.0"}
-        )
+        ) if traced else None
         
         try:
-            # Create a prompt for generating quotes
-            prompt = f"""Generate a single, original inspirational quote about {topic}. 
-            The quote should be:
-            - Meaningful and thought-provoking
-            - Concise (1-2 sentences maximum)
-            - Suitable for motivation or reflection
-            - Original (not a famous existing quote)
-            
-            Format: Just return the quote with proper attribution like "Quote" - Anonymous
-            
-            Topic: {topic}"""
-            
-            logger.info(f"🔵 Generating quote for topic: '{topic}'")
+            logger.info("🔵 Generating quote for topic: '%s'", topic)
             
-            # Create generation for LLM call tracking
-            generation = create_generation(
-                trace=trace,
-                name="openai_quote_generation",
-                model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-                input=[
-                    {"role": "system", "content": "You are a wise quote generator that creates original, inspirational quotes."},
-                    {"role": "user", "content": prompt}
-                ],
-                metadata={"topic": topic, "max_tokens": 150, "temperature": 0.8}
-            )
+            # Timed here so the generation recorded below covers the LLM call
+            started_at = datetime.now(timezone.utc) if trace else None
             
-            response = self._client.chat.completions.create(
-                model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-                messages=[
-                    {"role": "system", "content": "You are a wise quote generator that creates original, inspirational quotes."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=150,
-                temperature=0.8
+            content, usage, batch_size = await _prompt_batcher.submit(
+                self._client,
+                cache_key,
+                {"model": _MODEL, "messages": messages, "max_tokens": _MAX_TOKENS, "temperature": 0.8},
+                on_delta
             )
             
-            quote = response.choices[0].message.content.strip()
-            logger.info(f"🔴 Generated quote: {quote[:50]}...")
-            logger.debug(f"🔴 Token usage: {response.usage.total_tokens}")
-            
-            # Update generation with response
-            if generation:
-                generation.end(
+            quote = content.strip()
+            _response_cache.set(cache_key, quote)
+            if _redis_cache is not None:
+                await _redis_set(cache_key, quote)
+            if topic_vector is not None:
+                await asyncio.to_thread(_semantic_cache.add, topic_vector, quote)
+            logger.info("🔴 Generated quote: %.50s...", quote)
+            tokens_used = usage.total_tokens if usage else None
+            logger.debug("🔴 Token usage: %s", tokens_used)
+            record_metrics(quotes=1, tokens=tokens_used or 0)
+            
+            # Record the LLM call as a single generation event; for batched calls
+            # only one generation carries the shared usage
+            if trace:
+                emit(
+                    trace.generation,
+                    name="openai_quote_generation",
+                    model=_MODEL,
+                    input=messages,
                     output=quote,
                     usage={
-                        "input_tokens": response.usage.prompt_tokens,
-                        "output_tokens": response.usage.completion_tokens,
-                        "total_tokens": response.usage.total_tokens
-                    }
+                        "input_tokens": usage.prompt_tokens,
+                        "output_tokens": usage.completion_tokens,
+                        "total_tokens": usage.total_tokens
+                    } if usage else None,
+                    metadata={"topic": topic, "max_tokens": _MAX_TOKENS, "temperature": 0.8, "batch_size": batch_size},
+                    start_time=started_at,
+                    end_time=datetime.now(timezone.utc)
                 )
             
             # Update trace with final output
             if trace:
-                trace.update(
+                emit(
+                    trace.update,
                     output={"quote": quote, "topic": topic},
-                    metadata={"status": "success", "tokens_used": response.usage.total_tokens}
+                    metadata={"status": "success", "tokens_used": tokens_used, "batch_size": batch_size}
                 )
             
             return quote
             
         except Exception as e:
-            logger.error(f"Error generating quote for topic '{topic}': {e}")
+            logger.error("Error generating quote for topic '%s': %s", topic, e)
             error_msg = f"Sorry, I couldn't generate a quote about {topic} at the moment. Please try again later."
+            record_metrics(errors=1)
             
             # Update trace with error
             if trace:
-                trace.update(
+                emit(
+                    trace.update,
                     output={"error": str(e), "fallback_message": error_msg},
                     metadata={"status": "error"}
                 )
             
             return error_msg
     
-    async def random_quote(self) -> str:
-        """Generate a random inspirational quote."""
-        if not self._client:
-            return "Sorry, the quote generation service is currently unavailable. Please check the OpenAI API key configuration."
+    async def _embed_topic(self, topic: str) -> Optional["np.ndarray"]:
+        """Embed a topic for semantic cache lookup, returning None on failure."""
+        try:
+            response = await self._client.embeddings.create(
+                model=_EMBEDDING_MODEL,
+                input=topic
+            )
+            return _SemanticCache.normalize(response.data[0].embedding)
+        except Exception as e:
+            logger.warning("⚠️ Could not embed topic for semantic cache: %s", e)
+            return None
+    
+    async def random_quote(self, on_delta: Optional[DeltaCallback] = None, traced: bool = False) -> str:
+        """Generate a random inspirational quote, streaming chunks to on_delta if given.
+
+        traced is the caller's sampling decision; the generation is only traced when it is set.
+        """
+        messages = _RANDOM_QUOTE_MESSAGES
         
         # Create observability trace
         trace = create_trace(
             name="quote_generation",
             input={"type": "random"},
             metadata={"agent": "quote_generator", "version": "1.0.0"}
-        )
+        ) if traced else None
         
         try:
-            # Create a prompt for generating random quotes
-            prompt = """Generate a single, original inspirational quote on any topic you choose. 
-            The quote should be:
-            - Meaningful and thought-provoking
-            - Concise (1-2 sentences maximum)
-            - Suitable for motivation or reflection
-            - Original (not a famous existing quote)
-            - On a randomly chosen topic (success, courage, love, growth, wisdom, etc.)
-            
-            Format: Just return the quote with proper attribution like "Quote" - Anonymous
-            
-            Choose any inspiring topic you like!"""
-            
             logger.info("🔵 Generating random quote")
             
-            # Create generation for LLM call tracking
-            generation = create_generation(
-                trace=trace,
-                name="openai_random_quote_generation",
-                model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-                input=[
-                    {"role": "system", "content": "You are a wise quote generator that creates original, inspirational quotes."},
-                    {"role": "user", "content": prompt}
-                ],
-                metadata={"type": "random", "max_tokens": 150, "temperature": 0.9}
-            )
+            # Timed here so the generation recorded below covers the LLM call
+            started_at = datetime.now(timezone.utc) if trace else None
             
-            response = self._client.chat.completions.create(
-                model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-                messages=[
-                    {"role": "system", "content": "You are a wise quote generator that creates original, inspirational quotes."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=150,
-                temperature=0.9  # Higher temperature for more randomness
+            # Higher temperature for more randomness; batched requests get distinct samples
+            content, usage, batch_size = await _prompt_batcher.submit(
+                self._client, _RANDOM_QUOTE_KEY, _RANDOM_QUOTE_REQUEST, on_delta
             )
             
-            quote = response.choices[0].message.content.strip()
-            logger.info(f"🔴 Generated random quote: {quote[:50]}...")
-            logger.debug(f"🔴 Token usage: {response.usage.total_tokens}")
+            quote = content.strip()
+            logger.info("🔴 Generated random quote: %.50s...", quote)
+            tokens_used = usage.total_tokens if usage else None
+            logger.debug("🔴 Token usage: %s", tokens_used)
+            record_metrics(quotes=1, tokens=tokens_used or 0)
             
-            # Update generation with response
-            if generation:
-                generation.end(
+            # Record the LLM call as a single generation event; for batched calls
+            # only one generation carries the shared usage
+            if trace:
+                emit(
+                    trace.generation,
+                    name="openai_random_quote_generation",
+                    model=_MODEL,
+                    input=messages,
                     output=quote,
                     usage={
-                        "input_tokens": response.usage.prompt_tokens,
-                        "output_tokens": response.usage.completion_tokens,
-                        "total_tokens": response.usage.total_tokens
-                    }
+                        "input_tokens": usage.prompt_tokens,
+                        "output_tokens": usage.completion_tokens,
+                        "total_tokens": usage.total_tokens
+                    } if usage else None,
+                    metadata={"type": "random", "max_tokens": _MAX_TOKENS, "temperature": 0.9, "batch_size": batch_size},
+                    start_time=started_at,
+                    end_time=datetime.now(timezone.utc)
                 )
             
             # Update trace with final output
             if trace:
-                trace.update(
+                emit(
+                    trace.update,
                     output={"quote": quote, "type": "random"},
-                    metadata={"status": "success", "tokens_used": response.usage.total_tokens}
+                    metadata={"status": "success", "tokens_used": tokens_used, "batch_size": batch_size}
                 )
             
             return quote
             
         except Exception as e:
-            logger.error(f"Error generating random quote: {e}")
+            logger.error("Error generating random quote: %s", e)
             error_msg = "Sorry, I couldn't generate a random quote at the moment. Please try again later."
+            record_metrics(errors=1)
             
             # Update trace with error
             if trace:
-                trace.update(
+                emit(
+                    trace.update,
                     output={"error": str(e), "fallback_message": error_msg},
                     metadata={"status": "error"}
                 )
@@ -221,6 +616,32 @@ class QuoteGenerator(BaseModel):
             return error_msg
 
 
+class _UnavailableQuoteGenerator(QuoteGenerator):
+    """QuoteGenerator used when no OpenAI client could be initialized."""
+    
+    __slots__ = ()
+    
+    async def generate_quote(self, topic: str = "general inspiration", on_delta: Optional[DeltaCallback] = None, traced: bool = False) -> str:
+        """Report that quote generation is unavailable."""
+        return _UNAVAILABLE_MESSAGE
+    
+    async def random_quote(self, on_delta: Optional[DeltaCallback] = None, traced: bool = False) -> str:
+        """Report that quote generation is unavailable."""
+        return _UNAVAILABLE_MESSAGE
+
+
+# Message parts accessors, tried in order; RequestContext exposes .message directly,
+# the request-params path covers older SDK versions
+_MESSAGE_PARTS_GETTERS = (
+    operator.attrgetter("message.parts"),
+    operator.attrgetter("request.params.message.parts"),
+)
+
+# Streamed chunks are coalesced into one status update per interval or chunk count
+_STREAM_FLUSH_INTERVAL = float(os.getenv("STREAM_FLUSH_INTERVAL_MS", "50")) / 1000
+_STREAM_FLUSH_CHUNKS = int(os.getenv("STREAM_FLUSH_CHUNKS", "8"))
+
+
 class QuoteGeneratorExecutor(AgentExecutor):
     """Executor for the Quote Generator Agent following a2a_simple pattern."""
 
@@ -231,57 +652,77 @@ class QuoteGeneratorExecutor(AgentExecutor):
         """Execute the quote generation based on the user's request."""
         # Extract the user message text
         user_message = self._extract_user_message(context)
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        
+        pending: list[str] = []
+        last_flush = time.monotonic()
+        
+        async def stream_delta(delta: str) -> None:
+            """Forward buffered chunks of the quote to SSE subscribers as a working status update."""
+            nonlocal last_flush
+            pending.append(delta)
+            now = time.monotonic()
+            if len(pending) < _STREAM_FLUSH_CHUNKS and now - last_flush < _STREAM_FLUSH_INTERVAL:
+                return
+            text = "".join(pending)
+            pending.clear()
+            last_flush = now
+            await updater.update_status(
+                TaskState.working,
+                message=new_agent_text_message(text, context.context_id, context.task_id)
+            )
         
-        # Create main execution trace
+        # Sample once per request so the execution trace and its generation trace
+        # are either both recorded or both dropped
+        traced = should_trace()
         trace = create_trace(
             name="agent_request_execution",
             input={"user_message": user_message},
             metadata={"agent": "quote_generator", "version": "1.0.0"}
-        )
+        ) if traced else None
         
         try:
-            logger.info(f"📝 Processing request: '{user_message}'")
+            logger.info("📝 Processing request: '%s'", user_message)
+            
+            # Normalize once for both routing helpers
+            lowered = user_message.lower().strip()
             
             # Determine which quote generation method to use
-            if self._is_random_request(user_message):
+            if self._is_random_request(lowered):
                 logger.info("🎯 Routing to random quote generation")
-                result = await self.agent.random_quote()
+                result = await self.agent.random_quote(on_delta=stream_delta, traced=traced)
                 request_type = "random"
             else:
                 # Extract topic from the message
-                topic = self._extract_topic(user_message)
-                logger.info(f"🎯 Routing to topic quote generation: '{topic}'")
-                result = await self.agent.generate_quote(topic)
+                topic = self._extract_topic(lowered)
+                logger.info("🎯 Routing to topic quote generation: '%s'", topic)
+                result = await self.agent.generate_quote(topic, on_delta=stream_delta, traced=traced)
                 request_type = "topic_specific"
             
-            # Send the result back via event queue
-            await event_queue.enqueue_event(new_agent_text_message(result))
+            # Complete the task with the full quote
+            await updater.complete(message=new_agent_text_message(result, context.context_id, context.task_id))
             logger.info("✅ Quote generation completed successfully")
             
             # Update trace with success
             if trace:
-                trace.update(
+                emit(
+                    trace.update,
                     output={"quote": result, "request_type": request_type},
                     metadata={"status": "success", "user_message": user_message}
                 )
             
-            # Flush observability data
-            flush_observability()
-            
         except Exception as e:
-            logger.error(f"❌ Error in quote generation: {e}")
+            logger.error("❌ Error in quote generation: %s", e)
             error_message = f"Sorry, I encountered an error while generating your quote: {str(e)}"
-            await event_queue.enqueue_event(new_agent_text_message(error_message))
+            await updater.failed(message=new_agent_text_message(error_message, context.context_id, context.task_id))
             
             # Update trace with error
             if trace:
-                trace.update(
+                emit(
+                    trace.update,
                     output={"error": str(e), "fallback_message": error_message},
                     metadata={"status": "error", "user_message": user_message}
                 )
-            
-            # Flush observability data even on error
-            flush_observability()
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
         """Cancel the quote generation - not supported."""
@@ -290,77 +731,33 @@ class QuoteGeneratorExecutor(AgentExecutor):
     
     def _extract_user_message(self, context: RequestContext) -> str:
         """Extract the text message from the request context."""
-        try:
-            # Try different ways to access the message
-            
-            # Method 1: Direct access to message parts
-            if hasattr(context, 'request') and hasattr(context.request, 'params'):
-                params = context.request.params
-                if hasattr(params, 'message'):
-                    message = params.message
-                    if hasattr(message, 'parts') and message.parts:
-                        first_part = message.parts[0]
-                        if hasattr(first_part, 'root') and hasattr(first_part.root, 'text'):
-                            return first_part.root.text
-            
-            # Method 2: Check if it's a different structure
-            if hasattr(context, 'message'):
-                message = context.message
-                if hasattr(message, 'parts') and message.parts:
-                    first_part = message.parts[0]
-                    if hasattr(first_part, 'root') and hasattr(first_part.root, 'text'):
-                        return first_part.root.text
-            
-            # Method 3: Check if the text is directly available
-            if hasattr(context, 'text'):
-                return context.text
-            
-            # Method 4: Try to get from request body
-            if hasattr(context, 'request') and hasattr(context.request, 'body'):
-                body = context.request.body
-                if hasattr(body, 'message') and hasattr(body.message, 'parts'):
-                    first_part = body.message.parts[0]
-                    if hasattr(first_part, 'root') and hasattr(first_part.root, 'text'):
-                        return first_part.root.text
-            
-            # Log what we actually have for debugging
-            logger.warning(f"⚠️ Could not extract message. Context type: {type(context)}")
-            if hasattr(context, 'request'):
-                logger.warning(f"⚠️ Request type: {type(context.request)}")
-                if hasattr(context.request, 'params'):
-                    logger.warning(f"⚠️ Params: {context.request.params}")
-            
-            # Fallback - return a default message
-            return "Generate an inspirational quote"
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Could not extract user message: {e}")
-            return "Generate an inspirational quote"
+        for get_parts in _MESSAGE_PARTS_GETTERS:
+            try:
+                return get_parts(context)[0].root.text
+            except (AttributeError, IndexError, TypeError):
+                pass
+        
+        # Fallback - return a default message
+        logger.warning("⚠️ Could not extract message. Context type: %s", type(context))
+        return "Generate an inspirational quote"
     
-    def _is_random_request(self, text: str) -> bool:
-        """Determine if the request is for a random quote."""
-        text_lower = text.lower().strip()
-        random_keywords = ["random", "surprise", "any topic", "choose"]
-        return any(keyword in text_lower for keyword in random_keywords)
+    def _is_random_request(self, lowered: str) -> bool:
+        """Determine if the lowercased request is for a random quote."""
+        return _RANDOM_RE.search(lowered) is not None
     
-    def _extract_topic(self, text: str) -> str:
-        """Extract the topic from the user's message."""
-        text_lower = text.lower().strip()
-        
+    def _extract_topic(self, lowered: str) -> str:
+        """Extract the topic from the lowercased user message."""
         # Try to extract topic after "about"
-        if "about" in text_lower:
-            parts = text_lower.split("about", 1)
-            if len(parts) > 1:
-                topic = parts[1].strip().rstrip("?.")
-                if topic:
-                    return topic
-        
-        # Try to extract topic from quote request
-        if "quote" in text_lower:
-            # Remove "quote" and common words to get the topic
-            topic = text_lower.replace("quote", "").replace("generate", "").replace("create", "").replace("give me", "").strip()
-            if topic and len(topic) > 2:
+        match = _TOPIC_ABOUT_RE.search(lowered)
+        if match:
+            topic = match.group(1).strip()
+            if topic:
                 return topic
         
+        # Remove "quote" and common request words to get the topic
+        topic = _TOPIC_STRIP_RE.sub("", lowered).strip()
+        if len(topic) > 2:
+            return topic
+        
         # Default topic
         return "general inspiration" 
\ No newline at end of file
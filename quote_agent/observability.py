@@ -3,22 +3,58 @@ Observability configuration for the Quote Agent using Langfuse and OpenInference
 """
 
 import os
+import time
+import queue
+import random
 import logging
-from typing import Optional
-from langfuse import Langfuse
-from openinference.instrumentation.openai import OpenAIInstrumentor
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.resources import Resource
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+# Langfuse, OpenInference and the OpenTelemetry SDK are imported inside the
+# setup functions so they are never loaded when observability is disabled
+if TYPE_CHECKING:
+    from langfuse import Langfuse
+
+# Load environment variables before the settings below are read
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
 
 logger = logging.getLogger(__name__)
 
+# Settings are read once; the environment does not change after startup
+_LANGFUSE_ENABLED = os.getenv("LANGFUSE_ENABLED", "false").lower() == "true"
+_LANGFUSE_HOST = os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
+_OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "quote-agent")
+_OTEL_SERVICE_VERSION = os.getenv("OTEL_SERVICE_VERSION", "1.0.0")
+# Fraction of requests that get a full Langfuse trace
+_LANGFUSE_SAMPLE_RATE = float(os.getenv("LANGFUSE_SAMPLE_RATE", "1.0"))
+# Fraction of root traces exported; child spans follow their parent's decision
+_OTEL_SAMPLE_RATIO = float(os.getenv("OTEL_TRACES_SAMPLER_ARG", "1.0"))
+# Export in large, infrequent batches so span shipping stays off the hot path
+_OTEL_BSP_MAX_QUEUE_SIZE = int(os.getenv("OTEL_BSP_MAX_QUEUE_SIZE", "8192"))
+_OTEL_BSP_MAX_EXPORT_BATCH_SIZE = int(os.getenv("OTEL_BSP_MAX_EXPORT_BATCH_SIZE", "512"))
+_OTEL_BSP_SCHEDULE_DELAY = int(os.getenv("OTEL_BSP_SCHEDULE_DELAY", "5000"))
+_OTEL_BSP_EXPORT_TIMEOUT = int(os.getenv("OTEL_BSP_EXPORT_TIMEOUT", "30000"))
+
 # Global Langfuse client instance
-langfuse_client: Optional[Langfuse] = None
+langfuse_client: Optional["Langfuse"] = None
+
+# Trace updates queued by request handlers and applied by a background thread
+_telemetry_queue: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+_telemetry_thread: Optional[threading.Thread] = None
+
+# Always-on request totals, kept for sampled and unsampled requests alike
+# and logged by the telemetry worker every interval
+_metrics: Counter = Counter()
+_metrics_lock = threading.Lock()
+_METRICS_REPORT_INTERVAL = 60.0
+_reported_metrics: dict = {}
 
-def setup_observability() -> Optional[Langfuse]:
+def setup_observability() -> Optional["Langfuse"]:
     """
     Set up observability with Langfuse and OpenInference instrumentation.
     
@@ -28,13 +64,13 @@ def setup_observability() -> Optional[Langfuse]:
     global langfuse_client
     
     # Check if observability is enabled
-    if not _is_observability_enabled():
+    if not is_observability_enabled():
         logger.info("📊 Observability is disabled")
         return None
     
     try:
         # Initialize Langfuse
-        langfuse_client = _setup_langfuse()
+        client = _setup_langfuse()
         
         # Set up OpenTelemetry
         _setup_opentelemetry()
@@ -42,6 +78,12 @@ def setup_observability() -> Optional[Langfuse]:
         # Instrument OpenAI
         _setup_openai_instrumentation()
         
+        # Apply queued trace updates off the request path. The worker must be
+        # running before the client is published, or updates emitted for the
+        # first traces would be dropped.
+        _start_telemetry_worker()
+        langfuse_client = client
+        
         logger.info("✅ Observability setup completed successfully")
         return langfuse_client
         
@@ -49,23 +91,28 @@ def setup_observability() -> Optional[Langfuse]:
         logger.error(f"❌ Failed to setup observability: {e}")
         return None
 
-def _is_observability_enabled() -> bool:
+def is_observability_enabled() -> bool:
     """Check if observability is enabled via environment variable."""
-    return os.getenv("LANGFUSE_ENABLED", "false").lower() == "true"
+    return _LANGFUSE_ENABLED
 
-def _setup_langfuse() -> Langfuse:
+def _setup_langfuse() -> "Langfuse":
     """Initialize Langfuse client."""
+    from langfuse import Langfuse
+    
     secret_key = os.getenv("LANGFUSE_SECRET_KEY")
     public_key = os.getenv("LANGFUSE_PUBLIC_KEY")
-    host = os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
+    host = _LANGFUSE_HOST
     
     if not secret_key or not public_key:
         raise ValueError("LANGFUSE_SECRET_KEY and LANGFUSE_PUBLIC_KEY must be set")
     
+    # Requests are sampled before a trace is created (see should_trace),
+    # so the client must not sample them a second time
     client = Langfuse(
         secret_key=secret_key,
         public_key=public_key,
-        host=host
+        host=host,
+        sample_rate=1.0
     )
     
     logger.info(f"🔍 Langfuse initialized with host: {host}")
@@ -73,22 +120,28 @@ def _setup_langfuse() -> Langfuse:
 
 def _setup_opentelemetry():
     """Set up OpenTelemetry tracing."""
-    service_name = os.getenv("OTEL_SERVICE_NAME", "quote-agent")
-    service_version = os.getenv("OTEL_SERVICE_VERSION", "1.0.0")
+    from opentelemetry import trace
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
     
     # Create resource
     resource = Resource.create({
-        "service.name": service_name,
-        "service.version": service_version,
+        "service.name": _OTEL_SERVICE_NAME,
+        "service.version": _OTEL_SERVICE_VERSION,
     })
     
     # Set up tracer provider
-    tracer_provider = TracerProvider(resource=resource)
+    tracer_provider = TracerProvider(
+        resource=resource,
+        sampler=ParentBased(TraceIdRatioBased(_OTEL_SAMPLE_RATIO)),
+    )
     trace.set_tracer_provider(tracer_provider)
     
     # Set up OTLP exporter (optional - for external tracing systems)
-    langfuse_host = os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
-    otlp_endpoint = f"{langfuse_host}/api/public/ingestion"
+    otlp_endpoint = f"{_LANGFUSE_HOST}/api/public/ingestion"
     
     try:
         otlp_exporter = OTLPSpanExporter(
@@ -97,7 +150,13 @@ def _setup_opentelemetry():
                 "Authorization": f"Bearer {os.getenv('LANGFUSE_PUBLIC_KEY')}",
             }
         )
-        span_processor = BatchSpanProcessor(otlp_exporter)
+        span_processor = BatchSpanProcessor(
+            otlp_exporter,
+            max_queue_size=_OTEL_BSP_MAX_QUEUE_SIZE,
+            max_export_batch_size=_OTEL_BSP_MAX_EXPORT_BATCH_SIZE,
+            schedule_delay_millis=_OTEL_BSP_SCHEDULE_DELAY,
+            export_timeout_millis=_OTEL_BSP_EXPORT_TIMEOUT,
+        )
         tracer_provider.add_span_processor(span_processor)
         logger.info("🔄 OpenTelemetry OTLP exporter configured")
     except Exception as e:
@@ -105,10 +164,12 @@ def _setup_opentelemetry():
 
 def _setup_openai_instrumentation():
     """Set up OpenAI instrumentation with OpenInference."""
+    from openinference.instrumentation.openai import OpenAIInstrumentor
+    
     OpenAIInstrumentor().instrument()
     logger.info("🤖 OpenAI instrumentation enabled")
 
-def get_langfuse_client() -> Optional[Langfuse]:
+def get_langfuse_client() -> Optional["Langfuse"]:
     """Get the global Langfuse client instance."""
     return langfuse_client
 
@@ -132,39 +193,74 @@ def create_trace(name: str, **kwargs):
         logger.error(f"❌ Failed to create trace: {e}")
         return None
 
-def create_generation(trace, name: str, **kwargs):
-    """
-    Create a Langfuse generation for monitoring LLM calls.
-    
-    Args:
-        trace: Parent trace object
-        name: Name of the generation
-        **kwargs: Additional generation metadata
-        
-    Returns:
-        Langfuse generation object or None if observability is disabled
-    """
-    if not trace:
-        return None
+def _start_telemetry_worker():
+    """Start the thread that applies queued telemetry calls."""
+    global _telemetry_thread
     
-    try:
-        return trace.generation(name=name, **kwargs)
-    except Exception as e:
-        logger.error(f"❌ Failed to create generation: {e}")
-        return None
+    _telemetry_thread = threading.Thread(target=_telemetry_worker, name="telemetry", daemon=True)
+    _telemetry_thread.start()
 
-def flush_observability():
-    """Flush any pending observability data."""
-    if langfuse_client:
+def _telemetry_worker():
+    """Run queued telemetry calls until the shutdown sentinel arrives, reporting metrics periodically."""
+    next_report = time.monotonic() + _METRICS_REPORT_INTERVAL
+    while True:
+        timeout = next_report - time.monotonic()
+        if timeout <= 0:
+            _report_metrics()
+            next_report += _METRICS_REPORT_INTERVAL
+            continue
         try:
-            langfuse_client.flush()
-            logger.info("📤 Observability data flushed")
+            item = _telemetry_queue.get(timeout=timeout)
+        except queue.Empty:
+            continue
+        if item is None:
+            _report_metrics()
+            return
+        fn, args, kwargs = item
+        try:
+            fn(*args, **kwargs)
         except Exception as e:
-            logger.error(f"❌ Failed to flush observability data: {e}")
+            logger.error(f"❌ Failed to record telemetry: {e}")
+
+def emit(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+    """
+    Queue a telemetry call (e.g. trace.update) to run on the background worker.
+    
+    Langfuse batches and sends events itself, so the request path never
+    waits on telemetry I/O. Calls are dropped if observability is not running.
+    """
+    if _telemetry_thread is not None:
+        _telemetry_queue.put_nowait((fn, args, kwargs))
+
+def should_trace() -> bool:
+    """Decide whether the current request gets a full Langfuse trace."""
+    return _LANGFUSE_ENABLED and (_LANGFUSE_SAMPLE_RATE >= 1.0 or random.random() < _LANGFUSE_SAMPLE_RATE)
+
+def record_metrics(**counts: int) -> None:
+    """Add to the always-on request totals; a no-op when observability is disabled."""
+    if _LANGFUSE_ENABLED:
+        with _metrics_lock:
+            _metrics.update(counts)
+
+def _report_metrics():
+    """Log the request totals collected so far, if they changed since the last report."""
+    global _reported_metrics
+    
+    with _metrics_lock:
+        totals = dict(_metrics)
+    if totals and totals != _reported_metrics:
+        _reported_metrics = totals
+        logger.info(f"📈 Request totals: {totals}")
 
 def shutdown_observability():
     """Shutdown observability and cleanup resources."""
-    global langfuse_client
+    global langfuse_client, _telemetry_thread
+    
+    # Drain queued telemetry before the final flush
+    if _telemetry_thread is not None:
+        _telemetry_queue.put_nowait(None)
+        _telemetry_thread.join(timeout=5)
+        _telemetry_thread = None
     
     if langfuse_client:
         try:
@@ -0,0 +1,150 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+import orjson
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.apps.jsonrpc import jsonrpc_app
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill, Task, TaskState
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from agent_executor import (
+    QuoteGeneratorExecutor,
+    close_redis_cache,
+    close_shared_openai_clients,
+    warm_up_shared_openai_clients,
+)
+from observability import setup_observability, shutdown_observability
+
+# Load environment variables
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson instead of the stdlib encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+# The SDK has no hook for its response class, so swap orjson into its JSON-RPC responses
+jsonrpc_app.JSONResponse = ORJSONResponse
+
+_TERMINAL_TASK_STATES = frozenset(
+    {TaskState.completed, TaskState.failed, TaskState.canceled, TaskState.rejected}
+)
+
+
+class _ActiveTaskStore(InMemoryTaskStore):
+    """InMemoryTaskStore that only keeps tasks which are still running.
+
+    Every request becomes a task, and the stock store never evicts, so finished
+    tasks (with their streamed history) are dropped once they reach a terminal state.
+    """
+
+    async def save(self, task: Task) -> None:
+        if task.status.state in _TERMINAL_TASK_STATES:
+            async with self.lock:
+                self.tasks.pop(task.id, None)
+            return
+        await super().save(task)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    """Initialize observability and warm the OpenAI connection in the background, and clean up on shutdown."""
+    # uvicorn only starts accepting connections once startup returns, so the
+    # Langfuse handshake runs in a thread instead of delaying the listener.
+    # Requests served before it finishes are simply not traced.
+    observability_setup = asyncio.create_task(asyncio.to_thread(setup_observability))
+    openai_warmup = asyncio.create_task(warm_up_shared_openai_clients())
+    yield
+    openai_warmup.cancel()
+    try:
+        await observability_setup
+    finally:
+        await asyncio.to_thread(shutdown_observability)
+        await close_shared_openai_clients()
+        await close_redis_cache()
+
+
+def build_app() -> Starlette:
+    """Build the A2A Starlette application for a single server process."""
+    # Define agent skills - matching the original quote agent functionality
+    generate_quote_skill = AgentSkill(
+        id="generate_quote",
+        name="Generate Quote",
+        description="Generate a random inspirational quote on a given topic or theme",
+        tags=["quotes", "inspiration", "motivation", "wisdom"],
+        examples=[
+            "Generate a quote about success",
+            "Give me an inspirational quote about perseverance",
+            "Create a motivational quote about teamwork"
+        ],
+    )
+
+    random_quote_skill = AgentSkill(
+        id="random_quote",
+        name="Random Quote",
+        description="Generate a completely random inspirational quote on any topic",
+        tags=["quotes", "inspiration", "motivation", "random", "surprise"],
+        examples=[
+            "Give me a random quote",
+            "Surprise me with a quote",
+            "Random inspirational quote"
+        ],
+    )
+
+    # Create agent card
+    agent_card = AgentCard(
+        name="Quote Generator Agent",
+        description="Generates random inspirational quotes on various topics using OpenAI GPT models",
+        url="http://localhost:8080/",
+        defaultInputModes=["text"],
+        defaultOutputModes=["text"],
+        skills=[generate_quote_skill, random_quote_skill],
+        version="1.0.0",
+        capabilities=AgentCapabilities(streaming=True),
+    )
+
+    # Create request handler with quote generator executor
+    request_handler = DefaultRequestHandler(
+        agent_executor=QuoteGeneratorExecutor(),
+        task_store=_ActiveTaskStore(),
+    )
+
+    # The card never changes at runtime, so serialize it once instead of per request
+    agent_card_bytes = agent_card.model_dump_json(exclude_none=True, by_alias=True).encode()
+    
+    async def get_agent_card(request: Request) -> Response:
+        """Serve the pre-serialized agent card."""
+        return Response(
+            agent_card_bytes,
+            media_type="application/json",
+            headers={"Cache-Control": "public, max-age=300"},
+        )
+    
+    # Create and configure the A2A Starlette application; the pre-serialized
+    # card route is registered first so it takes precedence over the SDK's
+    server = A2AStarletteApplication(
+        http_handler=request_handler,
+        agent_card=agent_card,
+    )
+    app = Starlette(
+        routes=[Route(AGENT_CARD_WELL_KNOWN_PATH, get_agent_card, methods=["GET"])],
+        lifespan=lifespan,
+    )
+    server.add_routes_to_app(app)
+    return app
+
+
+# Imported by each uvicorn worker process
+app = build_app()
\ No newline at end of file
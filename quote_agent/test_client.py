@@ -1,5 +1,6 @@
 import uuid
 import asyncio
+import threading
 import httpx
 from a2a.client import A2ACardResolver, A2AClient
 from a2a.types import (
@@ -9,6 +10,7 @@ from a2a.types import (
     Part,
     Role,
     SendMessageRequest,
+    Task,
     TextPart,
 )
 
@@ -16,164 +18,201 @@ PUBLIC_AGENT_CARD_PATH = "/.well-known/agent.json"
 BASE_URL = "http://localhost:8080"
 
 
-async def test_quote_generation():
-    """Test the quote generation functionality of the agent."""
-    async with httpx.AsyncClient(timeout=30.0) as httpx_client:
-        # Initialize A2ACardResolver
-        resolver = A2ACardResolver(
-            httpx_client=httpx_client,
-            base_url=BASE_URL,
-        )
+def extract_quote_text(result) -> str | None:
+    """Return the quote text from a Message result or a completed Task's status message."""
+    message = result.status.message if isinstance(result, Task) else result
+    if message is not None and getattr(message, 'parts', None):
+        return message.parts[0].root.text
+    return None
+
+
+async def read_input(prompt: str) -> str:
+    """Read a line from stdin without blocking the event loop.
+
+    The read runs on a daemon thread rather than the default executor, so a
+    Ctrl+C does not leave interpreter shutdown waiting on a pending input().
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
 
-        final_agent_card_to_use: AgentCard | None = None
+    def deliver(result: str | None, error: BaseException | None) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
 
+    def read() -> None:
         try:
-            print(f"🔍 Fetching agent card from: {BASE_URL}{PUBLIC_AGENT_CARD_PATH}")
-            _public_card = await resolver.get_agent_card()
-            print("✅ Fetched agent card successfully")
-            print(f"📝 Agent: {_public_card.name}")
-            print(f"📋 Description: {_public_card.description}")
-            print(f"🛠️  Skills: {len(_public_card.skills)} available")
-            for skill in _public_card.skills:
-                print(f"   - {skill.name}: {skill.description}")
-            print()
-
-            final_agent_card_to_use = _public_card
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(deliver, None, e)
+        else:
+            loop.call_soon_threadsafe(deliver, line, None)
 
-        except Exception as e:
-            print(f"❌ Error fetching agent card: {e}")
-            raise RuntimeError("Failed to fetch agent card")
+    threading.Thread(target=read, daemon=True).start()
+    return await future
 
-        # Initialize A2A client
-        client = A2AClient(
-            httpx_client=httpx_client, 
-            agent_card=final_agent_card_to_use
-        )
-        print("✅ A2A Client initialized")
+
+async def test_quote_generation(httpx_client: httpx.AsyncClient):
+    """Test the quote generation functionality of the agent."""
+    # Initialize A2ACardResolver
+    resolver = A2ACardResolver(
+        httpx_client=httpx_client,
+        base_url=BASE_URL,
+    )
+
+    final_agent_card_to_use: AgentCard | None = None
+
+    try:
+        print(f"🔍 Fetching agent card from: {BASE_URL}{PUBLIC_AGENT_CARD_PATH}")
+        _public_card = await resolver.get_agent_card()
+        print("✅ Fetched agent card successfully")
+        print(f"📝 Agent: {_public_card.name}")
+        print(f"📋 Description: {_public_card.description}")
+        print(f"🛠️  Skills: {len(_public_card.skills)} available")
+        for skill in _public_card.skills:
+            print(f"   - {skill.name}: {skill.description}")
         print()
 
-        # Test cases for quote generation
-        test_messages = [
-            "Generate a quote about success",
-            "Give me an inspirational quote about courage",
-            "Create a quote about teamwork",
-            "Give me a random quote",
-            "Surprise me with a quote",
-            "Generate a motivational quote"
-        ]
+        final_agent_card_to_use = _public_card
+
+    except Exception as e:
+        print(f"❌ Error fetching agent card: {e}")
+        raise RuntimeError("Failed to fetch agent card")
+
+    # Initialize A2A client
+    client = A2AClient(
+        httpx_client=httpx_client, 
+        agent_card=final_agent_card_to_use
+    )
+    print("✅ A2A Client initialized")
+    print()
 
-        print("🧪 Starting Quote Generation Tests")
-        print("=" * 50)
+    # Test cases for quote generation
+    test_messages = [
+        "Generate a quote about success",
+        "Give me an inspirational quote about courage",
+        "Create a quote about teamwork",
+        "Give me a random quote",
+        "Surprise me with a quote",
+        "Generate a motivational quote"
+    ]
+
+    print("🧪 Starting Quote Generation Tests")
+    print("=" * 50)
 
-        for i, test_message in enumerate(test_messages, 1):
+    # Limit how many requests are in flight to stay clear of rate limits
+    semaphore = asyncio.Semaphore(4)
+
+    async def send(test_message: str):
+        """Send one test message and return the agent's response."""
+        # Create message payload
+        message_payload = Message(
+            role=Role.user,
+            messageId=str(uuid.uuid4()),
+            parts=[Part(root=TextPart(text=test_message))],
+        )
+        
+        # Create request
+        request = SendMessageRequest(
+            id=str(uuid.uuid4()),
+            params=MessageSendParams(
+                message=message_payload,
+            ),
+        )
+        
+        async with semaphore:
+            return await client.send_message(request)
+
+    # Send all test messages concurrently, then report the results in order
+    print(f"📤 Sending {len(test_messages)} test messages concurrently")
+    print("-" * 50)
+    responses = await asyncio.gather(*(send(m) for m in test_messages), return_exceptions=True)
+
+    for i, (test_message, response) in enumerate(zip(test_messages, responses), 1):
+        print(f"Test {i}: '{test_message}'")
+        
+        if isinstance(response, Exception):
+            print(f"❌ Test {i} failed: {response}")
+            print("-" * 50)
+            continue
+        
+        # Extract and display the quote
+        if hasattr(response, 'root') and hasattr(response.root, 'result'):
+            message_result = response.root.result
+            quote_text = extract_quote_text(message_result)
+            if quote_text:
+                print(f"📥 Response: {quote_text}")
+                print("✅ Test passed")
+            else:
+                print("❌ No quote text found in response")
+                print(f"Debug - message_result: {message_result}")
+        else:
+            print("❌ Unexpected response format")
+            print(f"Response: {response}")
+        
+        print("-" * 50)
+
+    print("🎯 Quote Generation Tests Completed!")
+
+
+async def interactive_mode(httpx_client: httpx.AsyncClient):
+    """Interactive mode for testing quote generation."""
+    try:
+        # Initialize resolver and client
+        resolver = A2ACardResolver(httpx_client=httpx_client, base_url=BASE_URL)
+        agent_card = await resolver.get_agent_card()
+        client = A2AClient(httpx_client=httpx_client, agent_card=agent_card)
+        
+        print("🎮 Interactive Quote Generator Test Mode")
+        print("Type 'quit' to exit")
+        print("-" * 40)
+        
+        while True:
             try:
-                print(f"Test {i}: '{test_message}'")
+                # Read stdin off the event loop so it keeps servicing connections
+                user_input = (await read_input("\nEnter your quote request: ")).strip()
                 
-                # Create message payload
+                if user_input.lower() in ['quit', 'exit', 'q']:
+                    print("👋 Goodbye!")
+                    break
+                
+                if not user_input:
+                    print("Please enter a quote request.")
+                    continue
+                
+                # Create and send message
                 message_payload = Message(
                     role=Role.user,
                     messageId=str(uuid.uuid4()),
-                    parts=[Part(root=TextPart(text=test_message))],
+                    parts=[Part(root=TextPart(text=user_input))],
                 )
                 
-                # Create request
                 request = SendMessageRequest(
                     id=str(uuid.uuid4()),
-                    params=MessageSendParams(
-                        message=message_payload,
-                    ),
+                    params=MessageSendParams(message=message_payload),
                 )
                 
-                print(f"📤 Sending: '{test_message}'")
-                
-                # Send message and get response
+                print(f"🔄 Generating quote...")
                 response = await client.send_message(request)
                 
                 # Extract and display the quote
                 if hasattr(response, 'root') and hasattr(response.root, 'result'):
-                    message_result = response.root.result
-                    if hasattr(message_result, 'parts') and message_result.parts:
-                        quote_text = message_result.parts[0].root.text
-                        print(f"📥 Response: {quote_text}")
-                        print("✅ Test passed")
+                    quote_text = extract_quote_text(response.root.result)
+                    if quote_text:
+                        print(f"✨ {quote_text}")
                     else:
-                        print("❌ No quote text found in response")
-                        print(f"Debug - message_result: {message_result}")
+                        print("❌ No quote received")
                 else:
                     print("❌ Unexpected response format")
-                    print(f"Response: {response}")
-                
-                print("-" * 50)
-                
-                # Small delay between requests
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                print(f"❌ Test {i} failed: {e}")
-                print("-" * 50)
-
-        print("🎯 Quote Generation Tests Completed!")
-
-
-async def interactive_mode():
-    """Interactive mode for testing quote generation."""
-    async with httpx.AsyncClient(timeout=30.0) as httpx_client:
-        try:
-            # Initialize resolver and client
-            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=BASE_URL)
-            agent_card = await resolver.get_agent_card()
-            client = A2AClient(httpx_client=httpx_client, agent_card=agent_card)
-            
-            print("🎮 Interactive Quote Generator Test Mode")
-            print("Type 'quit' to exit")
-            print("-" * 40)
-            
-            while True:
-                try:
-                    user_input = input("\nEnter your quote request: ").strip()
-                    
-                    if user_input.lower() in ['quit', 'exit', 'q']:
-                        print("👋 Goodbye!")
-                        break
-                    
-                    if not user_input:
-                        print("Please enter a quote request.")
-                        continue
                     
-                    # Create and send message
-                    message_payload = Message(
-                        role=Role.user,
-                        messageId=str(uuid.uuid4()),
-                        parts=[Part(root=TextPart(text=user_input))],
-                    )
-                    
-                    request = SendMessageRequest(
-                        id=str(uuid.uuid4()),
-                        params=MessageSendParams(message=message_payload),
-                    )
-                    
-                    print(f"🔄 Generating quote...")
-                    response = await client.send_message(request)
-                    
-                    # Extract and display the quote
-                    if hasattr(response, 'root') and hasattr(response.root, 'result'):
-                        message_result = response.root.result
-                        if hasattr(message_result, 'parts') and message_result.parts:
-                            quote_text = message_result.parts[0].root.text
-                            print(f"✨ {quote_text}")
-                        else:
-                            print("❌ No quote received")
-                    else:
-                        print("❌ Unexpected response format")
-                        
-                except KeyboardInterrupt:
-                    print("\n👋 Goodbye!")
-                    break
-                except Exception as e:
-                    print(f"❌ Error: {e}")
-                    
-        except Exception as e:
-            print(f"❌ Failed to initialize client: {e}")
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                
+    except Exception as e:
+        print(f"❌ Failed to initialize client: {e}")
 
 
 async def main():
@@ -182,38 +221,39 @@ async def main():
     print("=" * 50)
     print()
     
-    try:
-        # Check if agent is running
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{BASE_URL}/.well-known/agent.json", timeout=5)
+    # One pooled client serves the health check and every test request
+    async with httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_keepalive_connections=16)) as httpx_client:
+        try:
+            # Check if agent is running
+            response = await httpx_client.get(f"{BASE_URL}{PUBLIC_AGENT_CARD_PATH}", timeout=5)
             if response.status_code == 200:
                 print("✅ Agent is running and accessible")
             else:
                 print(f"⚠️ Agent responded with status {response.status_code}")
-    except Exception as e:
-        print(f"❌ Agent is not running or not accessible: {e}")
-        print("Please start the agent first with: uv run .")
-        return
-    
-    print()
-    print("Choose test mode:")
-    print("1. Automated tests")
-    print("2. Interactive mode")
-    
-    try:
-        choice = input("Enter your choice (1 or 2): ").strip()
+        except Exception as e:
+            print(f"❌ Agent is not running or not accessible: {e}")
+            print("Please start the agent first with: uv run .")
+            return
+        
+        print()
+        print("Choose test mode:")
+        print("1. Automated tests")
+        print("2. Interactive mode")
+        
+        choice = (await read_input("Enter your choice (1 or 2): ")).strip()
         
         if choice == "1":
-            await test_quote_generation()
+            await test_quote_generation(httpx_client)
         elif choice == "2":
-            await interactive_mode()
+            await interactive_mode(httpx_client)
         else:
             print("Invalid choice. Running automated tests...")
-            await test_quote_generation()
-            
-    except KeyboardInterrupt:
-        print("\n👋 Goodbye!")
+            await test_quote_generation(httpx_client)
 
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    # asyncio.run turns Ctrl+C into cancellation of main() and re-raises it here
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Goodbye!") 
\ No newline at end of file